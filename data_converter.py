@@ -1,6 +1,401 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import gzip
+import io
 import os
+from functools import partial
+from pandas.tseries.api import guess_datetime_format
+
+# Common OHLC export layouts, tried in order before falling back to pandas' own guess.
+# Month-first comes before day-first, so dates that fit both are read month-first.
+DATETIME_FORMATS = [
+    "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S", "%Y%m%d %H%M%S", "%Y%m%d %H%M",
+    "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d",
+]
+# strptime accepts short fields in the compact layouts ("1031" fits %H%M%S as 10:03:01),
+# so those are only used when every value has the full number of digits.
+COMPACT_PATTERNS = {
+    "%Y%m%d %H%M%S": r"\d{8} \d{6}",
+    "%Y%m%d %H%M": r"\d{8} \d{4}",
+}
+# A trailing UTC offset ("Z", "-05:00", "+0100"), dropped so timestamps keep their wall-clock time.
+UTC_OFFSET_PATTERN = r"\s*(?:Z|[+-]\d{2}:?\d{2})$"
+# Times that pd.to_timedelta can read directly (hh:mm:ss with optional fraction).
+TIME_PATTERN = r"\d{1,2}:\d{2}:\d{2}(?:\.\d+)?"
+# Uploads larger than this are read and cleaned in chunks of CHUNK_ROWS rows.
+CHUNKED_READ_BYTES = 100 * 1024 * 1024
+CHUNK_ROWS = 500_000
+# Cap on how many out-of-order rows are kept for display in the Data Quality Log.
+MAX_OUT_OF_ORDER_ROWS = 1000
+
+
+def detect_datetime_format(values, sample_size=100):
+    """
+    Detects a single strptime format for a column of date strings.
+
+    Passing an explicit format lets pd.to_datetime use its vectorized parser instead
+    of inferring (and possibly falling back to dateutil) element by element.
+
+    Args:
+        values (pd.Series): Date strings to inspect.
+        sample_size (int | None): Number of leading non-null values to test against, or
+            None to require a format that fits every value.
+
+    Returns:
+        str | None: The detected format, or None if no format could be determined.
+    """
+    sample = values.dropna()
+    if sample_size is not None:
+        sample = sample.head(sample_size)
+    if sample.empty:
+        return None
+    for fmt in DATETIME_FORMATS:
+        if fmt in COMPACT_PATTERNS and not sample.astype(str).str.fullmatch(COMPACT_PATTERNS[fmt]).all():
+            continue
+        try:
+            pd.to_datetime(sample, format=fmt, errors="raise")
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return guess_datetime_format(str(sample.iloc[0]))
+
+
+def parse_datetimes(values, sample_size=100):
+    """
+    Parses a column of date strings, coercing unparseable values to NaT.
+
+    Uses pd.to_datetime with a format detected from a sample, so the whole column goes
+    through pandas' vectorized parser. Timestamps with a UTC offset keep their wall-clock
+    time: the offset is dropped before parsing, which also covers files whose offset
+    changes (e.g. across a DST change).
+
+    Args:
+        values (pd.Series): Date strings to parse.
+        sample_size (int | None): Passed on to detect_datetime_format.
+
+    Returns:
+        pd.Series: datetime64 values.
+    """
+    fmt = detect_datetime_format(values, sample_size)
+    if fmt is not None and fmt.endswith("%z"):
+        values = values.astype(str).str.replace(UTC_OFFSET_PATTERN, "", regex=True)
+        fmt = fmt[:-2]
+    if fmt is not None and fmt.startswith("%Y-%m-%d"):
+        # pandas' ISO parser also takes rows with or without a time part, as the pyarrow
+        # reader does, so "2024-01-03" isn't dropped next to "2024-01-02T09:30:00".
+        fmt = "ISO8601"
+    return pd.to_datetime(values, format=fmt, errors="coerce")
+
+
+def parse_unique_dates(dates):
+    """
+    Parses a Date column by converting each distinct value only once.
+
+    Intraday files repeat each date many times, so the unique dates are parsed and the
+    result is mapped back to the rows through categorical codes. The categories are
+    sorted, so a leading sample would mostly be early months; the format is instead
+    chosen to fit every unique date, which also tells day-first files apart.
+
+    Args:
+        dates (pd.Series): Date values.
+
+    Returns:
+        pd.Series: datetime64 values, NaT where a row could not be parsed.
+    """
+    date_cat = dates.astype("category").cat
+    unique_dates = pd.Series(date_cat.categories.astype(str).str.strip())
+    parsed = parse_datetimes(unique_dates, sample_size=None)
+    # Code -1 (missing date) picks the trailing NaT.
+    parsed = np.append(parsed.to_numpy(), np.datetime64("NaT"))
+    return pd.Series(parsed[date_cat.codes.to_numpy()], index=dates.index)
+
+
+def parse_times(times):
+    """
+    Converts a Time column into timedeltas since midnight without a per-row string pass.
+
+    Each distinct value (datetime.time objects from the pyarrow reader, or hh:mm:ss
+    strings) is converted once and mapped back through categorical codes. Values that
+    don't match TIME_PATTERN become NaT rather than being read as plain numbers
+    (pd.to_timedelta would treat "930" as 930 nanoseconds).
+
+    Args:
+        times (pd.Series): Time-of-day values.
+
+    Returns:
+        pd.Series: timedelta64 values.
+    """
+    time_cat = times.astype("category").cat
+    unique_times = pd.Series(time_cat.categories.astype(str).str.strip())
+    parsed = pd.to_timedelta(unique_times.where(unique_times.str.fullmatch(TIME_PATTERN)), errors="coerce")
+    # Code -1 (missing time) picks the trailing NaT.
+    parsed = np.append(parsed.to_numpy(), np.timedelta64("NaT"))
+    return pd.Series(parsed[time_cat.codes.to_numpy()], index=times.index)
+
+
+def combine_date_time(dates, times):
+    """
+    Combines separate Date and Time columns into a single datetime Series.
+
+    When the times are hh:mm:ss values, Date and Time are parsed separately, then added
+    as timedeltas, avoiding a per-row string concat and re-parse.
+    Otherwise the columns are joined with numpy string ops and parsed as one string.
+
+    Args:
+        dates (pd.Series): Date values.
+        times (pd.Series): Time-of-day values.
+
+    Returns:
+        pd.Series: datetime64 values, NaT where a row could not be parsed.
+    """
+    sample = times.dropna().head(100).astype(str).str.strip()
+    if sample.str.fullmatch(TIME_PATTERN).all():
+        return parse_unique_dates(dates) + parse_times(times)
+
+    dates = dates.astype(str).str.strip()
+    times = times.astype(str).str.strip()
+    if sample.str.fullmatch(r"\d{1,6}").all():
+        # Numeric HHMM / HHMMSS times are read as ints and lose their leading zero
+        # ("0930" -> 930), so pad them back to the file's widest layout.
+        times = times.str.zfill(4 if times.str.len().max() <= 4 else 6)
+    combined = np.char.add(np.char.add(dates.to_numpy(dtype=str), " "), times.to_numpy(dtype=str))
+    combined = pd.Series(combined, index=dates.index)
+    return parse_datetimes(combined)
+
+
+def read_matches_c_engine(df):
+    """
+    Returns False if the pyarrow reader gave columns the C engine would read differently.
+
+    pyarrow converts timestamps with a UTC offset to UTC, while the C engine leaves them
+    as text so parse_datetimes can keep their wall-clock time. pyarrow also keeps
+    repeated header names as they are (the C engine renames them "Date.1", ...), and
+    returns a column with bytes that aren't valid UTF-8 as raw bytes objects, where the
+    C engine reports a read error.
+    """
+    if df.columns.duplicated().any():
+        return False
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+            return False
+        if df[col].dtype == object:
+            first = df[col].first_valid_index()
+            if first is not None and isinstance(df[col][first], bytes):
+                return False
+    return True
+
+
+def read_upload(file_bytes):
+    """
+    Reads the uploaded bytes as comma-separated values.
+
+    Uploads above CHUNKED_READ_BYTES are read in CHUNK_ROWS-row chunks with the C engine
+    so each chunk can be cleaned (and its Date/Time strings released) before the next one
+    is loaded. Smaller uploads use the pyarrow engine, falling back to the C engine for
+    files it reads differently (see read_matches_c_engine). Both paths produce the usual
+    NumPy dtypes, e.g. an int column with blanks becomes float64.
+
+    Args:
+        file_bytes (bytes): Raw contents of the uploaded file.
+
+    Yields:
+        pd.DataFrame: The whole file, or its consecutive chunks.
+
+    Raises:
+        ValueError: If the file cannot be read.
+    """
+    buf = io.BytesIO(file_bytes)
+    try:
+        if len(file_bytes) > CHUNKED_READ_BYTES:
+            yield from pd.read_csv(buf, sep=",", chunksize=CHUNK_ROWS, engine="c")
+            return
+        try:
+            # The pyarrow engine's reader is multi-threaded. Columns are converted to the
+            # usual NumPy dtypes: Arrow-backed timestamp/date/time columns would only be
+            # turned back into objects or strings by every later step.
+            df = pd.read_csv(buf, sep=",", engine="pyarrow")
+        except Exception:
+            df = None  # pyarrow missing or file rejected by it
+        if df is None or not read_matches_c_engine(df):
+            # Fall back to the default C engine.
+            buf.seek(0)
+            df = pd.read_csv(buf, sep=",")
+    except Exception as e:
+        raise ValueError(f"Error reading file: {e}") from e
+    yield df
+
+
+def clean_chunk(df, log):
+    """
+    Cleans column names and parses the Date column of one chunk of the upload.
+
+    Args:
+        df (pd.DataFrame): Raw rows as read from the file.
+        log (dict): Data Quality Log, updated in place.
+
+    Returns:
+        pd.DataFrame: The chunk with a datetime 'Date' column and unparseable rows dropped.
+
+    Raises:
+        ValueError: If the chunk has duplicate column names or no usable 'Date' column.
+    """
+    # --- Clean Column Names ---
+    df.columns = [str(c).strip() for c in df.columns]  # Remove extra spaces from column names
+    if df.columns.duplicated().any():
+        duplicates = df.columns[df.columns.duplicated()].unique()
+        raise ValueError(f"Duplicate column names found in the file: {', '.join(duplicates)}")
+
+    # Rename "Last" column to "Close" if it exists.
+    if "Last" in df.columns:
+        df.rename(columns={"Last": "Close"}, inplace=True)
+
+    # --- Combine Date and Time Columns (if available) ---
+    if "Date" in df.columns and "Time" in df.columns:
+        log["combined_time"] = True
+        try:
+            # Failed rows become NaT
+            df["Date"] = combine_date_time(df["Date"], df["Time"])
+
+            # now you can safely drop Time
+            df = df.drop(columns=["Time"])
+
+        except Exception as e:
+            raise ValueError(f"Error combining Date and Time columns: {e}") from e
+
+    # --- Ensure Date Column is Datetime ---
+    if "Date" not in df.columns:
+        raise ValueError("No 'Date' column found in the file.")
+
+    # Force conversion to datetime (already done if Date/Time were combined above, or
+    # if the reader typed the column itself).
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = parse_datetimes(df["Date"])
+
+    # The ordering and duplicate checks work on naive int64 timestamps, so timezone-aware
+    # dates drop the zone and keep their wall-clock time.
+    if isinstance(df["Date"].dtype, pd.DatetimeTZDtype):
+        df["Date"] = df["Date"].dt.tz_localize(None)
+    elif not pd.api.types.is_datetime64_dtype(df["Date"]):
+        raise ValueError("The 'Date' column could not be converted to datetimes.")
+
+    # Drop rows that could not be parsed, whichever step produced the NaT.
+    # The one NaT mask gives both the count and the rows to keep.
+    invalid = df["Date"].isna().to_numpy()
+    invalid_count = int(invalid.sum())
+    if invalid_count:
+        log["invalid_rows"] += invalid_count
+        df = df[~invalid]
+
+    return df
+
+
+# --- Cached Processing ---
+# Streamlit reruns the whole script on every widget interaction, so the heavy
+# parsing/cleaning work lives in cached functions keyed on the uploaded bytes.
+# The cache is shared by every session on the server, so only the most recent
+# uploads are kept to bound memory.
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_and_clean(file_bytes: bytes):
+    """
+    Reads the uploaded file and runs the full clean/combine/sort/dedup pipeline.
+
+    Args:
+        file_bytes (bytes): Raw contents of the uploaded file.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: The processed data and a log of what was fixed
+        (counts plus the small tables shown in the Data Quality Log).
+
+    Raises:
+        ValueError: If the file cannot be read or has no usable 'Date' column.
+    """
+    log = {
+        "combined_time": False,
+        "invalid_rows": 0,
+        "out_of_order_count": 0,
+        "out_of_order_rows": None,
+        "dup_count": 0,
+        "dupes_log": None,
+    }
+
+    parts = []
+    for chunk in read_upload(file_bytes):
+        if not parts:
+            log["raw_preview"] = chunk.head()
+        parts.append(clean_chunk(chunk, log))
+    # Ordering and duplicates are checked across the whole file, after the chunks are joined.
+    # Joining copies every chunk into new column blocks (copy=False can't avoid that for
+    # more than one frame), so peak memory here is about twice the cleaned frame; the
+    # chunks are released straight after so it doesn't stay that high.
+    df = parts[0] if len(parts) == 1 else pd.concat(parts)
+    del parts
+
+    # The ordering and duplicate checks run on the raw int64 timestamps.
+    ts = df["Date"].to_numpy().view("i8")
+
+    # 1. Log Ordering Mistakes
+    # Find rows where the date is smaller than the previous row's date
+    # These are the specific rows causing the disorder
+    out_of_order_mask = np.zeros(len(ts), dtype=bool)
+    out_of_order_mask[1:] = ts[1:] < ts[:-1]
+    is_sorted = not out_of_order_mask.any()
+    if not is_sorted:
+        log["out_of_order_count"] = int(out_of_order_mask.sum())
+        # Only the first rows are copied out for display; badly ordered files can have a huge number
+        log["out_of_order_rows"] = df.iloc[np.flatnonzero(out_of_order_mask)[:MAX_OUT_OF_ORDER_ROWS]]
+
+    # 2. Fix Ordering (Sort)
+    # Stable sort so the first occurrence of a duplicate timestamp stays first
+    if not is_sorted:
+        df = df.sort_values(by="Date", kind="mergesort")
+        ts = df["Date"].to_numpy().view("i8")
+
+    # 3. Log & Fix Duplicates
+    # Once sorted, duplicates are adjacent: a row is the first occurrence of its
+    # timestamp unless it equals the previous row.
+    same_as_prev = ts[1:] == ts[:-1]
+    if same_as_prev.any():
+        is_first = np.ones(len(ts), dtype=bool)
+        is_first[1:] = ~same_as_prev
+
+        # Identify all duplicates to show the user
+        # Rows that share a timestamp with a neighbour, so we can see the groups
+        in_dup_group = ~is_first
+        in_dup_group[:-1] |= same_as_prev
+
+        # Mark the "Action" column
+        # The first occurrence of each timestamp is kept, later ones are removed
+        action = np.where(is_first[in_dup_group], "Kept", "Removed")
+        log["dupes_log"] = df[in_dup_group].assign(Action=action)
+        log["dup_count"] = int(in_dup_group.sum())
+
+        # Actually remove the duplicates from the main dataframe
+        df = df[is_first]
+
+    # Source row labels were only needed for the logs above; give the result a fresh
+    # RangeIndex without copying any column data.
+    df.index = pd.RangeIndex(len(df))
+
+    log["preview"] = df.head(20)
+
+    return df, log
+
+
+# Each entry is a whole encoded file, so only the last few downloads are kept.
+@st.cache_data(show_spinner=False, max_entries=4)
+def to_csv_gzip(_df, cache_key, date_fmt):
+    """
+    Encodes a DataFrame as gzip-compressed UTF-8 CSV bytes using the given date format.
+
+    Compression level 1 is used since the download is latency-sensitive. The frame
+    itself is not hashed (leading underscore); `cache_key` must identify its contents
+    instead, e.g. the upload id plus the selected date range.
+    """
+    csv_bytes = _df.to_csv(index=False, date_format=date_fmt).encode("utf-8")
+    return gzip.compress(csv_bytes, compresslevel=1)
+
 
 st.set_page_config(page_title="Text to CSV Converter", layout="wide")
 st.title("Text File to Perfect CSV Converter")
@@ -8,7 +403,7 @@ st.title("Text File to Perfect CSV Converter")
 st.markdown("""
 This app lets you upload your raw OHLC data file (CSV or TXT).  
 It cleans up column names (removing extra spaces), renames a **Last** column to **Close** if present,  
-combines separate **Date** and **Time** columns into a single **Date** column,  
+combines separate **Date** and **Time** columns into a single **Date** column,
 allows you to filter the data by date, and then download or save the processed CSV file.
 """)
 
@@ -17,114 +412,52 @@ uploaded_file = st.file_uploader("Upload your OHLC text file (CSV or TXT)", type
 
 if uploaded_file is not None:
     try:
-        # Read the file assuming comma-separated values.
-        df = pd.read_csv(uploaded_file, sep=",")
-    except Exception as e:
-        st.error(f"Error reading file: {e}")
+        df, log = load_and_clean(uploaded_file.getvalue())
+    except ValueError as e:
+        st.error(str(e))
         st.stop()
 
     st.markdown("### Raw File Preview")
-    st.dataframe(df.head())
+    st.dataframe(log["raw_preview"])
 
-    # --- Clean Column Names ---
-    df.columns = df.columns.str.strip()  # Remove extra spaces from column names
-    
-    # Rename "Last" column to "Close" if it exists.
-    if "Last" in df.columns:
-        df.rename(columns={"Last": "Close"}, inplace=True)
-    
-    # --- Combine Date and Time Columns (if available) ---
-    if "Date" in df.columns and "Time" in df.columns:
+    if log["combined_time"]:
         st.info("Combining 'Date' and 'Time' columns into a single 'Date' column...")
-        try:
-            combined_datetime = df["Date"].astype(str) + " " + df["Time"].astype(str)
-            # Let pandas infer the format (or specify your actual format here if known)
-            df["Date"] = pd.to_datetime(
-                combined_datetime,
-                errors="coerce",               # force failures to NaT
-                infer_datetime_format=True     # try to infer common datetime patterns
-            )
-            
-            # how many rows failed?
-            invalid = df["Date"].isna().sum()
-            if invalid:
-                st.warning(f"{invalid} rows failed to parse and will be dropped.")
-                before = len(df)
-                df = df.dropna(subset=["Date"])
-                after = len(df)
-                st.info(f"Dropped {before - after} rows after combining Date/Time.")
-            
-            # now you can safely drop Time
-            df = df.drop(columns=["Time"])
-
-        except Exception as e:
-            st.error(f"Error combining Date and Time columns: {e}")
-            st.stop()
+        if log["invalid_rows"]:
+            st.warning(f"{log['invalid_rows']} rows failed to parse and will be dropped.")
+            st.info(f"Dropped {log['invalid_rows']} rows after combining Date/Time.")
     else:
         st.info("No separate 'Time' column found.")
-
-    # --- Ensure Date Column is Datetime ---
-    if "Date" in df.columns:
-        # Force conversion to datetime and drop rows that cannot be parsed.
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce", infer_datetime_format=True)
-        if df["Date"].isnull().any():
+        if log["invalid_rows"]:
             st.warning("Some rows have invalid Date values and will be dropped.")
-            df = df.dropna(subset=["Date"])
-        st.write("Date column type:", df["Date"].dtype)
-
-        # --- DATA QUALITY LOG & FIX ---
-        st.markdown("### Data Quality Log (Ordering & Duplicates)")
-
-        # 1. Log Ordering Mistakes
-        # Check if dates are monotonic increasing
-        if not df["Date"].is_monotonic_increasing:
-            st.warning("Data is not in strict chronological order.")
-            # Find rows where the date is smaller than the previous row's date
-            # These are the specific rows causing the disorder
-            out_of_order_mask = df["Date"] < df["Date"].shift(1)
-            out_of_order_rows = df[out_of_order_mask]
-            
-            with st.expander(f"View {len(out_of_order_rows)} Out-of-Order Rows"):
+    st.write("Date column type:", df["Date"].dtype)
+
+    # --- DATA QUALITY LOG & FIX ---
+    st.markdown("### Data Quality Log (Ordering & Duplicates)")
+
+    if log["out_of_order_count"]:
+        st.warning("Data is not in strict chronological order.")
+        # Tables inside the expanders are only sent to the browser while they are open.
+        with st.expander(f"View {log['out_of_order_count']} Out-of-Order Rows", key="out_of_order_log", on_change="rerun") as exp:
+            if exp.open:
                 st.write("The following rows appeared out of sequence and will be re-ordered:")
-                st.dataframe(out_of_order_rows)
-        else:
-            st.success("Data is already in chronological order.")
-
-        # 2. Fix Ordering (Sort)
-        df = df.sort_values(by="Date")
-
-        # 3. Log & Fix Duplicates
-        # Check for duplicates after sorting
-        if df.duplicated(subset=["Date"]).any():
-            st.warning("Duplicate timestamps found.")
-            
-            # Identify all duplicates to show the user
-            # keep=False marks ALL duplicates as True so we can see the groups
-            dupes_log = df[df.duplicated(subset=["Date"], keep=False)].copy()
-            
-            # Mark the "Action" column
-            # 'duplicated(keep='first')' returns False for the first occurrence (Keep) 
-            # and True for subsequent ones (Remove)
-            is_duplicate_subsequent = dupes_log.duplicated(subset=["Date"], keep='first')
-            dupes_log["Action"] = "Kept"
-            dupes_log.loc[is_duplicate_subsequent, "Action"] = "Removed"
-
-            with st.expander(f"View {len(dupes_log)} Duplicate Rows & Actions"):
-                st.write("The following table shows all duplicate timestamps and which row was kept vs removed:")
-                st.dataframe(dupes_log)
-            
-            # Actually remove the duplicates from the main dataframe
-            df = df.drop_duplicates(subset=["Date"], keep="first")
-            st.info("Duplicates have been removed (kept the first occurrence).")
-        else:
-            st.success("No duplicate timestamps found.")
+                if log["out_of_order_count"] > MAX_OUT_OF_ORDER_ROWS:
+                    st.caption(f"Showing the first {MAX_OUT_OF_ORDER_ROWS} of {log['out_of_order_count']} rows.")
+                st.dataframe(log["out_of_order_rows"])
+    else:
+        st.success("Data is already in chronological order.")
 
+    if log["dup_count"]:
+        st.warning("Duplicate timestamps found.")
+        with st.expander(f"View {log['dup_count']} Duplicate Rows & Actions", key="dupes_log", on_change="rerun") as exp:
+            if exp.open:
+                st.write("The following table shows all duplicate timestamps and which row was kept vs removed:")
+                st.dataframe(log["dupes_log"])
+        st.info("Duplicates have been removed (kept the first occurrence).")
     else:
-        st.error("No 'Date' column found in the file.")
-        st.stop()
+        st.success("No duplicate timestamps found.")
 
     st.markdown("### Processed File Preview")
-    st.dataframe(df.head())
+    st.dataframe(log["preview"])
 
     # --- Date Range Filter ---
     st.markdown("### Date Range Filter")
@@ -133,11 +466,17 @@ if uploaded_file is not None:
     date_range = st.date_input("Select date range", [min_date, max_date], min_value=min_date, max_value=max_date)
     if len(date_range) == 2:
         start_date, end_date = date_range
-        df_filtered = df[(df["Date"] >= pd.to_datetime(start_date)) & (df["Date"] <= pd.to_datetime(end_date))]
+        filter_key = (start_date, end_date)
+        # Date is sorted after cleaning, so the range is a contiguous slice found by binary search
+        dates = df["Date"].to_numpy()
+        lo = dates.searchsorted(np.datetime64(start_date), side="left")
+        hi = dates.searchsorted(np.datetime64(end_date), side="right")
+        df_filtered = df.iloc[lo:hi]
         st.markdown("### Filtered Data Preview")
         st.dataframe(df_filtered.head())
     else:
         df_filtered = df
+        filter_key = None
 
     # --- Save Options ---
     st.markdown("### Save Options")
@@ -145,49 +484,45 @@ if uploaded_file is not None:
     folder_path = st.text_input("Folder Path", value=default_folder)
     full_file_name = st.text_input("Full Processed File Name", value="converted_data.csv")
     filtered_file_name = st.text_input("Filtered File Name", value="filtered_data.csv")
-    
+
     # Set the desired date format for CSV output
     date_fmt = "%m/%d/%Y %H:%M"
-    
-    # Convert DataFrames to CSV bytes using the specified date format.
-    csv_data_full = df.to_csv(index=False, date_format=date_fmt).encode("utf-8")
-    csv_data_filtered = df_filtered.to_csv(index=False, date_format=date_fmt).encode("utf-8")
-    
+
+    # Gzipped CSV bytes are only built when a download button is actually clicked, and are
+    # cached per upload and date range so repeat downloads don't re-serialize.
     st.download_button(
-        label="Download Complete Processed CSV",
-        data=csv_data_full,
-        file_name=full_file_name,
-        mime="text/csv"
+        label="Download Complete Processed CSV (.gz)",
+        data=partial(to_csv_gzip, df, (uploaded_file.file_id, None), date_fmt),
+        file_name=full_file_name + ".gz",
+        mime="application/gzip"
     )
     st.download_button(
-        label="Download Filtered CSV",
-        data=csv_data_filtered,
-        file_name=filtered_file_name,
-        mime="text/csv"
+        label="Download Filtered CSV (.gz)",
+        data=partial(to_csv_gzip, df_filtered, (uploaded_file.file_id, filter_key), date_fmt),
+        file_name=filtered_file_name + ".gz",
+        mime="application/gzip"
     )
-    
+
     if st.button("Save Complete Processed CSV to Folder"):
         try:
-            if not os.path.exists(folder_path):
-                os.makedirs(folder_path)
+            os.makedirs(folder_path, exist_ok=True)
             full_path = os.path.join(folder_path, full_file_name)
-            # Added newline="" to prevent extra blank lines
-            with open(full_path, "w", encoding="utf-8", newline="") as f:
-                f.write(df.to_csv(index=False, date_format=date_fmt))
+            # Stream straight to the file. pandas opens it with newline="", so rows end in
+            # os.linesep as in the download, without extra blank lines.
+            df.to_csv(full_path, index=False, date_format=date_fmt, encoding="utf-8")
             st.success(f"File saved to {full_path}")
         except Exception as e:
             st.error(f"Error saving file: {e}")
-    
+
     if st.button("Save Filtered CSV to Folder"):
         try:
-            if not os.path.exists(folder_path):
-                os.makedirs(folder_path)
+            os.makedirs(folder_path, exist_ok=True)
             filtered_path = os.path.join(folder_path, filtered_file_name)
-            # Added newline="" to prevent extra blank lines
-            with open(filtered_path, "w", encoding="utf-8", newline="") as f:
-                f.write(df_filtered.to_csv(index=False, date_format=date_fmt))
+            # Stream straight to the file. pandas opens it with newline="", so rows end in
+            # os.linesep as in the download, without extra blank lines.
+            df_filtered.to_csv(filtered_path, index=False, date_format=date_fmt, encoding="utf-8")
             st.success(f"Filtered file saved to {filtered_path}")
         except Exception as e:
             st.error(f"Error saving file: {e}")
 else:
-    st.info("Please upload a file to begin the conversion process.")
\ No newline at end of file
+    st.info("Please upload a file to begin the conversion process.")